@@ -3,26 +3,97 @@ Pytest configuration and shared fixtures for casq black-box tests.
 """
 
 import os
+import shutil
 import subprocess
+import tempfile
 from pathlib import Path
-from typing import Tuple
 
 import pytest
 
+from .helpers import object_path, run_casq, stdout_hash, write_test_tree
+
 # Project root (one level up from tests/)
 ROOT = Path(__file__).resolve().parent.parent
 
+# RAM-backed filesystem used for tmp_path when available
+TMPFS_ROOT = Path("/dev/shm")
 
-@pytest.fixture(scope="session")
-def casq_bin() -> Path:
-    """Ensure casq is built and return path to binary."""
-    bin_path = ROOT / "target" / "debug" / "casq"
+# Free space tmpfs must have before tests use it; Docker's default /dev/shm
+# (64 MiB) is too small for the chunking tests
+TMPFS_MIN_FREE = 512 * 1024 * 1024
+
+
+def pytest_configure(config):
+    """
+    Place tmp_path directories on tmpfs when the host provides enough of it.
+
+    casq writes many small objects per test, so keeping stores in RAM removes
+    disk latency from the hot path. Only the temp root moves: pytest still
+    creates and prunes its numbered pytest-N directories under it, and an
+    explicit --basetemp always wins.
+    """
+    if config.option.basetemp is not None or not TMPFS_ROOT.is_dir():
+        return
+    if shutil.disk_usage(TMPFS_ROOT).free < TMPFS_MIN_FREE:
+        return
+    # In-process only, so the casq child processes see an unchanged environment
+    tempfile.tempdir = str(TMPFS_ROOT)
+
+
+# Blobs at or above this size are chunked by casq (CHUNKING_THRESHOLD in
+# casq_core/src/store.rs)
+CHUNKING_THRESHOLD = 1024 * 1024
+
+
+# Sources whose changes require rebuilding the casq binary
+SOURCE_DIRS = ("casq/src", "casq_core/src")
+SOURCE_FILES = ("Cargo.toml", "Cargo.lock", "casq/Cargo.toml", "casq_core/Cargo.toml")
+
+
+def _newest_source_mtime() -> float:
+    """Return the newest modification time among the casq build inputs."""
+    paths = [ROOT / name for name in SOURCE_FILES]
+    for src_dir in SOURCE_DIRS:
+        paths.extend((ROOT / src_dir).rglob("*.rs"))
+    return max(path.stat().st_mtime for path in paths if path.exists())
+
+
+def _casq_bin_path() -> Path:
+    """
+    Return the casq binary the tests run against.
+
+    The release build is used, since the chunking tests hash megabytes of
+    data; set CASQ_TEST_DEBUG=1 to use the debug build instead.
+    """
+    profile = "debug" if os.environ.get("CASQ_TEST_DEBUG") == "1" else "release"
+    return ROOT / "target" / profile / "casq"
+
+
+def pytest_sessionstart(session):
+    """
+    Build casq before any test starts.
+
+    Runs in the main process only: pytest-xdist spawns its workers after this
+    hook returns, so they all find the binary ready instead of each checking
+    (and possibly building) it from a fixture. cargo is only invoked when the
+    binary is missing or older than the sources. --collect-only skips it.
+    """
+    if hasattr(session.config, "workerinput") or session.config.option.collectonly:
+        return
 
-    # Build if binary doesn't exist
-    if not bin_path.exists():
+    bin_path = _casq_bin_path()
+    if not bin_path.exists() or bin_path.stat().st_mtime < _newest_source_mtime():
         print("\nBuilding casq binary...")
-        subprocess.check_call(["cargo", "build"], cwd=ROOT)
+        cmd = ["cargo", "build", "-p", "casq", "--bin", "casq"]
+        if bin_path.parent.name == "release":
+            cmd.append("--release")
+        subprocess.check_call(cmd, cwd=ROOT)
 
+
+@pytest.fixture(scope="session")
+def casq_bin() -> Path:
+    """Return path to the casq binary built by pytest_sessionstart."""
+    bin_path = _casq_bin_path()
     assert bin_path.exists(), f"Binary not found at {bin_path}"
     return bin_path
 
@@ -39,3 +110,138 @@ def casq_env(tmp_path, casq_bin):
     env["CASQ_ROOT"] = str(root)
 
     return casq_bin, env, root
+
+
+@pytest.fixture(scope="session")
+def store_template(tmp_path_factory, casq_bin) -> Path:
+    """
+    Initialize one empty store per session for tests to clone.
+
+    Under pytest-xdist each worker runs its own session, so every worker gets
+    a private template below its own basetemp and nothing is shared.
+    """
+    root = tmp_path_factory.mktemp("store-template") / "casq-store"
+    env = os.environ.copy()
+    env["CASQ_ROOT"] = str(root)
+    run_casq(casq_bin, env, "initialize", check=True)
+
+    return root
+
+
+@pytest.fixture
+def initialized_casq_env(casq_env, store_template):
+    """
+    Return (binary_path, env, root) like casq_env, with the store initialized.
+
+    The store is copied from a session-wide template instead of running
+    `casq initialize` per test. Files are copied rather than hard-linked
+    because casq appends to the journal and ref files in place. copyfile
+    skips copy2's per-file copystat; casq ignores store file modes and times.
+    """
+    _, _, root = casq_env
+    shutil.copytree(store_template, root, copy_function=shutil.copyfile)
+
+    return casq_env
+
+
+@pytest.fixture(scope="session")
+def tree_store_template(tmp_path_factory, casq_bin, store_template):
+    """
+    Return (root, tree_hash) for a template store holding the sample tree.
+
+    helpers.write_test_tree is put once per session (per xdist worker) so
+    tests that only read the tree skip the put.
+    """
+    base = tmp_path_factory.mktemp("tree-template")
+    root = base / "casq-store"
+    shutil.copytree(store_template, root, copy_function=shutil.copyfile)
+    workspace = base / "workspace"
+    workspace.mkdir()
+    write_test_tree(workspace)
+    env = os.environ.copy()
+    env["CASQ_ROOT"] = str(root)
+    proc = run_casq(casq_bin, env, "put", str(workspace), check=True)
+
+    return root, stdout_hash(proc)
+
+
+@pytest.fixture
+def tree_casq_env(casq_env, tree_store_template):
+    """
+    Return (binary_path, env, root, tree_hash) with the sample tree stored.
+
+    Like initialized_casq_env, but the store is copied from
+    tree_store_template, so tree_hash already names a tree holding
+    helpers.write_test_tree.
+    """
+    casq_bin, env, root = casq_env
+    template_root, tree_hash = tree_store_template
+    shutil.copytree(template_root, root, copy_function=shutil.copyfile)
+
+    return casq_bin, env, root, tree_hash
+
+
+@pytest.fixture(scope="session")
+def blob_cache(tmp_path_factory, casq_bin, store_template):
+    """
+    Session-wide map of blob content -> hash, backed by a scratch store.
+
+    Each distinct content is put once per session; see put_blob.
+    """
+    root = tmp_path_factory.mktemp("blob-cache") / "casq-store"
+    shutil.copytree(store_template, root, copy_function=shutil.copyfile)
+    env = os.environ.copy()
+    env["CASQ_ROOT"] = str(root)
+    return {"casq_bin": casq_bin, "env": env, "root": root, "hashes": {}}
+
+
+@pytest.fixture
+def put_blob(initialized_casq_env, blob_cache):
+    """
+    Return a function that stores a blob in this test's store and returns its hash.
+
+    The object file is copied from the session blob_cache instead of running
+    put, so tests that only need an object to point at skip a casq invocation.
+    Only that one file is copied: no journal entry is written, and a chunked
+    blob would arrive without its chunks. So content must stay below the
+    chunking threshold, and tests of put itself, of the journal, or of object
+    counts after a put must run put directly.
+    """
+    _, _, root = initialized_casq_env
+    hashes = blob_cache["hashes"]
+
+    def put(content: str) -> str:
+        assert len(content.encode()) < CHUNKING_THRESHOLD, (
+            "put_blob only copies unchunked blobs; run put for large content"
+        )
+        if content not in hashes:
+            proc = run_casq(
+                blob_cache["casq_bin"],
+                blob_cache["env"],
+                "put",
+                "-",
+                input=content,
+                check=True,
+            )
+            hashes[content] = stdout_hash(proc)
+        obj_hash = hashes[content]
+        dest = object_path(root, obj_hash)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(object_path(blob_cache["root"], obj_hash), dest)
+        return obj_hash
+
+    return put
+
+
+SAMPLE_BLOB = "sample content\n"
+
+
+@pytest.fixture
+def sample_blob(put_blob):
+    """
+    Store the canonical sample blob in this test's store.
+
+    Returns (blob_hash, content). Tests that only need some valid blob share
+    this content, so its put runs once per session instead of once per test.
+    """
+    return put_blob(SAMPLE_BLOB), SAMPLE_BLOB
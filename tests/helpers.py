@@ -3,11 +3,16 @@ Helper utilities for casq tests.
 """
 
 import json
+import os
+import random
 import subprocess
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Union
 
-ROOT = Path(__file__).resolve().parent.parent
+import blake3
+
+# Length of a BLAKE3-256 hash in hex
+HASH_HEX_LEN = 64
 
 
 def assert_json_success(stdout: str, expected_keys: list = None) -> Dict[str, Any]:
@@ -28,8 +33,8 @@ def assert_json_success(stdout: str, expected_keys: list = None) -> Dict[str, An
     )
 
     if expected_keys:
-        for key in expected_keys:
-            assert key in data, f"Expected key '{key}' in JSON output"
+        missing = set(expected_keys) - data.keys()
+        assert not missing, f"Expected keys {sorted(missing)} in JSON output"
 
     return data
 
@@ -54,12 +59,183 @@ def assert_json_error(stderr: str) -> Dict[str, Any]:
     return data
 
 
+def content_hash(content: Union[str, bytes]) -> str:
+    """
+    Return the hash casq assigns to a blob with the given content.
+
+    Blob hashes are plain BLAKE3 over the uncompressed content, so tests can
+    predict them without another casq invocation.
+    """
+    if isinstance(content, str):
+        content = content.encode()
+    return blake3.blake3(content).hexdigest()
+
+
+def stdout_hash(proc: subprocess.CompletedProcess) -> str:
+    """
+    Return the object hash a text-mode command printed on stdout.
+
+    Commands such as put print exactly one hex hash followed by a newline, so
+    the hash is sliced out rather than stripped and split.
+    """
+    stdout = proc.stdout
+    if isinstance(stdout, bytes):
+        stdout = stdout.decode()
+    assert stdout[HASH_HEX_LEN:] == "\n", (
+        f"Expected a single hash on stdout, got: {stdout!r}"
+    )
+    return stdout[:HASH_HEX_LEN]
+
+
+def object_path(root: Path, obj_hash: str) -> Path:
+    """Return the on-disk path of an object in the store at root."""
+    # One join and one Path, rather than a Path per "/" segment
+    return Path(os.path.join(root, "objects", "blake3-256", obj_hash[:2], obj_hash[2:]))
+
+
+def count_objects(root: Path) -> int:
+    """
+    Count object files in the store at root.
+
+    Walks the two-level objects/<algo>/<prefix>/ layout with os.scandir, so
+    each entry's type comes from the directory listing instead of a stat call.
+    """
+    count = 0
+    with os.scandir(root / "objects" / "blake3-256") as shards:
+        for shard in shards:
+            if shard.is_dir():
+                with os.scandir(shard.path) as entries:
+                    count += sum(1 for entry in entries if entry.is_file())
+    return count
+
+
+def _current_hash(ref_path: str) -> Optional[str]:
+    """
+    Return the last hash recorded in a ref file.
+
+    Ref files are append-only histories, so only the final line is decoded
+    rather than splitting the whole file into lines.
+    """
+    with open(ref_path, "rb") as f:
+        data = f.read().rstrip()
+    if not data:
+        return None
+    return data.rsplit(b"\n", 1)[-1].decode("ascii")
+
+
+def read_ref(root: Path, name: str) -> Optional[str]:
+    """
+    Return a reference's current hash, or None if it does not exist.
+
+    A single open() answers both "does it exist" and "what does it point to".
+    """
+    try:
+        return _current_hash(os.path.join(root, "refs", name))
+    except FileNotFoundError:
+        return None
+
+
+def read_refs(root: Path) -> Dict[str, str]:
+    """
+    Read references straight from the store's refs/ directory.
+
+    Cheaper than spawning `casq references list` when a test only needs to
+    check a post-condition rather than the command's output format.
+
+    Args:
+        root: Store root directory
+
+    Returns:
+        Dict mapping reference name to its current (last recorded) hash
+    """
+    refs = {}
+    with os.scandir(root / "refs") as entries:
+        for entry in entries:
+            if entry.is_file():
+                current = _current_hash(entry.path)
+                if current is not None:
+                    refs[entry.name] = current
+    return refs
+
+
+def parse_references_list(stdout: str) -> Dict[str, str]:
+    """
+    Parse text-mode `casq references list` output in a single pass.
+
+    Each line is "<hash> <name>"; a malformed line fails the assertion
+    instead of being skipped.
+
+    Returns:
+        Dict mapping reference name to hash
+    """
+    refs = {}
+    for line in stdout.splitlines():
+        obj_hash, sep, name = line.partition(" ")
+        assert sep and len(obj_hash) == HASH_HEX_LEN, f"Malformed line: {line!r}"
+        refs[name] = obj_hash
+    return refs
+
+
+def parse_metadata(stdout: str) -> Dict[str, str]:
+    """
+    Parse text-mode `casq metadata` output in a single pass.
+
+    Each line is "<Field>: <value>"; a malformed line fails the assertion
+    instead of being skipped.
+
+    Returns:
+        Dict mapping field name (e.g. "Type", "Size") to its value
+    """
+    fields = {}
+    for line in stdout.splitlines():
+        key, sep, value = line.partition(": ")
+        assert sep, f"Malformed line: {line!r}"
+        fields[key] = value
+    return fields
+
+
 def write_test_file(path: Path, content: str = "test content\n"):
     """Create a test file with given content."""
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_text(content)
 
 
+def write_sections(path: Path, *sections: bytes):
+    """
+    Write byte sections to a file back to back without concatenating them.
+
+    Uses os.writev so the sections go to the kernel in one call; the loop
+    only repeats on a short write.
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        views = [memoryview(section) for section in sections]
+        while views:
+            written = os.writev(fd, views)
+            while views and written >= len(views[0]):
+                written -= len(views.pop(0))
+            if written:
+                views[0] = views[0][written:]
+    finally:
+        os.close(fd)
+
+
+def write_random(
+    path: Path, size: int, seed: int = 0xC45C, block_size: int = 64 * 1024
+):
+    """
+    Fill a file with size pseudo-random bytes, generated one block at a time.
+
+    The data only has to be incompressible to force chunk boundaries, so a
+    fixed seed replaces os.urandom and keeps the chunk layout identical
+    between runs.
+    """
+    rng = random.Random(seed)
+    with open(path, "wb") as f:
+        for offset in range(0, size, block_size):
+            f.write(rng.randbytes(min(block_size, size - offset)))
+
+
 def write_test_tree(root: Path):
     """Create a test directory tree for testing."""
     (root / "file1.txt").write_text("file 1 content\n")
@@ -95,7 +271,7 @@ def compare_golden(actual: str, golden_name: str, update: bool = False) -> bool:
 
 
 def run_casq(
-    casq_bin, env, *args, input=None, check=False
+    casq_bin, env, *args, input=None, check=False, text=True
 ) -> subprocess.CompletedProcess:
     """
     Helper to run casq and capture stdout/stderr.
@@ -104,18 +280,22 @@ def run_casq(
         casq_bin: Path to casq binary
         env: Environment dict (should include CASQ_ROOT)
         *args: Command arguments
-        input: Optional stdin input (str)
+        input: Optional stdin input (str, or bytes when text is False)
         check: If True, raise CalledProcessError on non-zero exit
+        text: If False, pass input and capture output as raw bytes, skipping
+            the UTF-8 encode/decode for binary content
 
     Returns:
         CompletedProcess with stdout/stderr captured
     """
+    # No cwd (paths are absolute) and no close_fds (Python fds are already
+    # non-inheritable) lets CPython spawn casq with posix_spawn
     return subprocess.run(
         [str(casq_bin), *args],
         input=input,
         env=env,
-        cwd=ROOT,  # Run from workspace root
-        text=True,
+        text=text,
         capture_output=True,
         check=check,
+        close_fds=False,
     )
@@ -5,45 +5,59 @@ Tests verify that FastCDC v2020 with 128KB min chunks provides good
 deduplication when files are modified (insertions, deletions, appends).
 """
 
-import os
-from pathlib import Path
-from .helpers import run_casq, write_test_file
+import filecmp
 
+import pytest
 
-def test_chunk_reuse_after_append(casq_env):
+from .helpers import (
+    content_hash,
+    count_objects,
+    run_casq,
+    stdout_hash,
+    write_random,
+    write_sections,
+)
+
+# Multi-megabyte inputs and several casq runs per test
+pytestmark = pytest.mark.slow
+
+# 256-byte building blocks for the patterned inputs
+PATTERN = bytes(range(256))
+REVERSED_PATTERN = PATTERN[::-1]
+
+
+def test_chunk_reuse_after_append(initialized_casq_env):
     """Test that appending to a large file reuses most chunks."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     workspace = root.parent / "workspace"
     workspace.mkdir()
 
     # Create a 2MB file (will be chunked)
     original_file = workspace / "large.bin"
-    original_data = bytes(range(256)) * (8 * 1024)  # 2MB with pattern
+    original_data = PATTERN * (8 * 1024)  # 2MB with pattern
     original_file.write_bytes(original_data)
 
     # Put original file
     proc1 = run_casq(casq_bin, env, "put", str(original_file), "--reference", "v1")
     assert proc1.returncode == 0
-    hash1 = proc1.stdout.strip()
+    hash1 = stdout_hash(proc1)
 
     # Append 500KB to the file
-    appended_data = original_data + bytes(reversed(range(256))) * (2 * 1024)  # +500KB
-    original_file.write_bytes(appended_data)
+    with open(original_file, "ab") as f:
+        f.write(REVERSED_PATTERN * (2 * 1024))  # +500KB
 
     # Put modified file
     proc2 = run_casq(casq_bin, env, "put", str(original_file), "--reference", "v2")
     assert proc2.returncode == 0
-    hash2 = proc2.stdout.strip()
+    hash2 = stdout_hash(proc2)
 
     # Hashes should be different
     assert hash1 != hash2, "Modified file should have different hash"
 
     # Check storage - most chunks should be shared
     # We expect significant deduplication (chunks are shared between v1 and v2)
-    objects_dir = root / "objects" / "blake3-256"
-    num_objects = sum(1 for _ in objects_dir.rglob("*") if _.is_file())
+    num_objects = count_objects(root)
 
     # With perfect deduplication: v1 has ~4 chunks, v2 shares those + adds ~1 new chunk
     # So we should see ~5-6 total chunk objects (plus 2 ChunkList objects, plus 1 tree/blob if small)
@@ -53,17 +67,16 @@ def test_chunk_reuse_after_append(casq_env):
     )
 
 
-def test_chunk_reuse_after_prepend(casq_env):
+def test_chunk_reuse_after_prepend(initialized_casq_env):
     """Test that prepending to a large file reuses significant chunks."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     workspace = root.parent / "workspace"
     workspace.mkdir()
 
     # Create a 3MB file (will be chunked)
     original_file = workspace / "large.bin"
-    original_data = bytes(range(256)) * (12 * 1024)  # 3MB
+    original_data = PATTERN * (12 * 1024)  # 3MB
     original_file.write_bytes(original_data)
 
     # Put original file
@@ -71,26 +84,24 @@ def test_chunk_reuse_after_prepend(casq_env):
         casq_bin, env, "put", str(original_file), "--reference", "original"
     )
     assert proc1.returncode == 0
-    hash1 = proc1.stdout.strip()
+    hash1 = stdout_hash(proc1)
 
     # Prepend 2KB to the file (small insertion at start)
-    prepended_data = bytes(reversed(range(256))) * 8 + original_data  # +2KB at start
-    original_file.write_bytes(prepended_data)
+    write_sections(original_file, REVERSED_PATTERN * 8, original_data)
 
     # Put modified file
     proc2 = run_casq(
         casq_bin, env, "put", str(original_file), "--reference", "modified"
     )
     assert proc2.returncode == 0
-    hash2 = proc2.stdout.strip()
+    hash2 = stdout_hash(proc2)
 
     # Hashes should be different
     assert hash1 != hash2
 
     # With v2020 and smaller chunks, we should see significant chunk reuse
     # even after prepending (boundary shift resilience)
-    objects_dir = root / "objects" / "blake3-256"
-    num_objects = sum(1 for _ in objects_dir.rglob("*") if _.is_file())
+    num_objects = count_objects(root)
 
     # Original: ~6 chunks, Modified: should reuse ~4-5 chunks
     # Without deduplication: ~12 chunk objects total
@@ -100,10 +111,9 @@ def test_chunk_reuse_after_prepend(casq_env):
     )
 
 
-def test_small_file_not_chunked(casq_env):
+def test_small_file_not_chunked(initialized_casq_env):
     """Test that files smaller than 1MB are not chunked."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     workspace = root.parent / "workspace"
     workspace.mkdir()
@@ -118,76 +128,63 @@ def test_small_file_not_chunked(casq_env):
     assert proc.returncode == 0
 
     # Should be stored as blob (compressed but not chunked)
-    objects_dir = root / "objects" / "blake3-256"
-    objects = list(objects_dir.rglob("*"))
-    blobs = [o for o in objects if o.is_file()]
+    num_objects = count_objects(root)
 
     # Should be exactly 1 object (the compressed blob)
-    assert len(blobs) == 1, (
-        f"Small file should create 1 blob, found {len(blobs)} objects"
+    assert num_objects == 1, (
+        f"Small file should create 1 blob, found {num_objects} objects"
     )
 
 
-def test_large_file_is_chunked(casq_env):
+def test_large_file_is_chunked(initialized_casq_env):
     """Test that files >= 1MB are chunked into multiple objects."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     workspace = root.parent / "workspace"
     workspace.mkdir()
 
     # Create a 2MB file with random entropic data (not compressible, ensures chunking boundaries)
     large_file = workspace / "large.bin"
-    import os
-
-    large_data = os.urandom(2 * 1024 * 1024)  # 2MB of random data
-    large_file.write_bytes(large_data)
+    write_random(large_file, 2 * 1024 * 1024)  # 2MB of random data
 
     # Put large file
     proc = run_casq(casq_bin, env, "put", str(large_file))
     assert proc.returncode == 0
 
     # Should be stored as ChunkList + multiple chunk blobs
-    objects_dir = root / "objects" / "blake3-256"
-    objects = list(objects_dir.rglob("*"))
-    blobs = [o for o in objects if o.is_file()]
+    num_objects = count_objects(root)
 
     # Should have multiple objects: 1 ChunkList + N chunk blobs (at least 3 chunks for 2MB)
     # With 128KB min, 512KB avg, we expect ~4 chunks + 1 ChunkList = 5 objects
-    assert len(blobs) >= 4, (
-        f"Large file should create ChunkList + chunks, found {len(blobs)} objects"
+    assert num_objects >= 4, (
+        f"Large file should create ChunkList + chunks, found {num_objects} objects"
     )
 
 
-def test_identical_chunks_deduped(casq_env):
+def test_identical_chunks_deduped(initialized_casq_env):
     """Test that identical chunks in different files are deduplicated."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     workspace = root.parent / "workspace"
     workspace.mkdir()
 
     # Create two files with identical 1MB sections
-    shared_section = bytes(range(256)) * (4 * 1024)  # 1MB
+    shared_section = PATTERN * (4 * 1024)  # 1MB
     unique_section1 = b"A" * (1024 * 1024)  # 1MB
     unique_section2 = b"B" * (1024 * 1024)  # 1MB
 
     file1 = workspace / "file1.bin"
-    file1.write_bytes(shared_section + unique_section1)  # 2MB
+    write_sections(file1, shared_section, unique_section1)  # 2MB
 
     file2 = workspace / "file2.bin"
-    file2.write_bytes(shared_section + unique_section2)  # 2MB
-
-    # Put both files
-    proc1 = run_casq(casq_bin, env, "put", str(file1), "--reference", "file1")
-    assert proc1.returncode == 0
+    write_sections(file2, shared_section, unique_section2)  # 2MB
 
-    proc2 = run_casq(casq_bin, env, "put", str(file2), "--reference", "file2")
-    assert proc2.returncode == 0
+    # Put both files in one invocation by putting their directory
+    proc = run_casq(casq_bin, env, "put", str(workspace), "--reference", "files")
+    assert proc.returncode == 0
 
-    # Count total objects
-    objects_dir = root / "objects" / "blake3-256"
-    num_objects = sum(1 for _ in objects_dir.rglob("*") if _.is_file())
+    # Count total objects, less the one tree object for the workspace
+    num_objects = count_objects(root) - 1
 
     # Without deduplication: file1 (~4 chunks) + file2 (~4 chunks) = ~8 chunks + 2 ChunkLists = 10
     # With deduplication: shared chunks stored once, so fewer total objects
@@ -197,10 +194,9 @@ def test_identical_chunks_deduped(casq_env):
     )
 
 
-def test_roundtrip_chunked_file(casq_env):
+def test_roundtrip_chunked_file(initialized_casq_env):
     """Test that chunked files can be materialized correctly."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     workspace = root.parent / "workspace"
     workspace.mkdir()
@@ -208,30 +204,32 @@ def test_roundtrip_chunked_file(casq_env):
     # Create a 3MB file with recognizable pattern
     original_file = workspace / "original.bin"
     # Use a pattern that's easy to verify
-    pattern = bytes(range(256))
-    original_data = pattern * (12 * 1024)  # 3MB
+    original_data = PATTERN * (12 * 1024)  # 3MB
     original_file.write_bytes(original_data)
 
-    # Put file
+    # Put file; chunked files are still addressed by the hash of their content
     proc_put = run_casq(casq_bin, env, "put", str(original_file))
     assert proc_put.returncode == 0
-    hash_str = proc_put.stdout.strip()
+    hash_str = stdout_hash(proc_put)
+    assert hash_str == content_hash(original_data)
 
     # Materialize to new location
     restored_file = workspace / "restored.bin"
     proc_mat = run_casq(casq_bin, env, "materialize", hash_str, str(restored_file))
     assert proc_mat.returncode == 0
 
-    # Verify content matches exactly
-    restored_data = restored_file.read_bytes()
-    assert len(restored_data) == len(original_data), "Restored file size mismatch"
-    assert restored_data == original_data, "Restored file content mismatch"
+    # Verify content matches exactly, streaming both files from disk
+    assert restored_file.stat().st_size == len(original_data), (
+        "Restored file size mismatch"
+    )
+    assert filecmp.cmp(original_file, restored_file, shallow=False), (
+        "Restored file content mismatch"
+    )
 
 
-def test_delete_middle_chunk_reuse(casq_env):
+def test_delete_middle_chunk_reuse(initialized_casq_env):
     """Test chunk reuse when deleting data from middle of file."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     workspace = root.parent / "workspace"
     workspace.mkdir()
@@ -244,24 +242,21 @@ def test_delete_middle_chunk_reuse(casq_env):
     section_c = b"C" * (1024 * 1024)
     section_d = b"D" * (1024 * 1024)
 
-    original_data = section_a + section_b + section_c + section_d  # 4MB
-    original_file.write_bytes(original_data)
+    write_sections(original_file, section_a, section_b, section_c, section_d)  # 4MB
 
     # Put original
     proc1 = run_casq(casq_bin, env, "put", str(original_file), "--reference", "v1")
     assert proc1.returncode == 0
 
     # Delete middle section (section_b)
-    modified_data = section_a + section_c + section_d  # 3MB
-    original_file.write_bytes(modified_data)
+    write_sections(original_file, section_a, section_c, section_d)  # 3MB
 
     # Put modified
     proc2 = run_casq(casq_bin, env, "put", str(original_file), "--reference", "v2")
     assert proc2.returncode == 0
 
     # With good boundary detection, section_a and section_d chunks should be reused
-    objects_dir = root / "objects" / "blake3-256"
-    num_objects = sum(1 for _ in objects_dir.rglob("*") if _.is_file())
+    num_objects = count_objects(root)
 
     # We expect significant chunk reuse from sections A, C, D
     # Without deduplication: ~14 objects (8 chunks + 2 ChunkLists + refs/trees)
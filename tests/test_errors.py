@@ -2,6 +2,9 @@
 Tests for error handling and UX.
 """
 
+import json
+import sys
+
 from .helpers import run_casq
 
 
@@ -13,11 +16,8 @@ def test_command_without_initialize(casq_env):
     proc = run_casq(casq_bin, env, "put", "-", input="test\n")
     assert proc.returncode != 0
     # Should mention store error
-    error_output = proc.stderr + proc.stdout
-    assert (
-        "failed to open store" in error_output.lower()
-        or "not found" in error_output.lower()
-    )
+    error_output = (proc.stderr + proc.stdout).lower()
+    assert "failed to open store" in error_output or "not found" in error_output
 
 
 def test_unknown_command(casq_env):
@@ -32,10 +32,9 @@ def test_unknown_command(casq_env):
     assert "does-not-exist" in error_output or "Usage:" in error_output
 
 
-def test_invalid_hash_format(casq_env):
+def test_invalid_hash_format(initialized_casq_env):
     """Test that invalid hash format is rejected."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     proc = run_casq(casq_bin, env, "get", "notahexstring")
     assert proc.returncode != 0
@@ -44,10 +43,9 @@ def test_invalid_hash_format(casq_env):
     assert "unknown" in (proc.stderr).lower()
 
 
-def test_nonexistent_hash(casq_env):
+def test_nonexistent_hash(initialized_casq_env):
     """Test that non-existent hash returns error."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     fake_hash = "0" * 64
     proc = run_casq(casq_bin, env, "get", fake_hash)
@@ -56,30 +54,25 @@ def test_nonexistent_hash(casq_env):
     assert "failed" in error_output or "not found" in error_output
 
 
-def test_put_nonexistent_file(casq_env):
+def test_put_nonexistent_file(initialized_casq_env):
     """Test that putting non-existent file returns error."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     proc = run_casq(casq_bin, env, "put", "/nonexistent/path/file.txt")
     assert proc.returncode != 0
 
-    error_output = proc.stderr + proc.stdout
+    error_output = (proc.stderr + proc.stdout).lower()
     assert (
-        "failed" in error_output.lower()
-        or "not found" in error_output.lower()
-        or "no such file" in error_output.lower()
+        "failed" in error_output
+        or "not found" in error_output
+        or "no such file" in error_output
     )
 
 
-def test_materialize_to_existing_file(casq_env):
+def test_materialize_to_existing_file(initialized_casq_env, sample_blob):
     """Test materializing to existing file location."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
-
-    # Put content
-    proc_put = run_casq(casq_bin, env, "put", "-", input="test\n")
-    obj_hash = proc_put.stdout.strip()
+    casq_bin, env, root = initialized_casq_env
+    obj_hash, _ = sample_blob
 
     # Create destination file
     dest = root.parent / "existing.txt"
@@ -91,15 +84,12 @@ def test_materialize_to_existing_file(casq_env):
     assert proc_mat.returncode in (0, 1)
 
 
-def test_stdin_from_tty_fails(casq_env):
+def test_stdin_from_tty_fails(initialized_casq_env):
     """Test that stdin mode detects TTY and fails with helpful message."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     # Note: This test may not work in CI environments without a real TTY
     # The test is here for documentation, but may need to be skipped in CI
-    import sys
-
     if not sys.stdin.isatty():
         # Skip test if not running with TTY
         return
@@ -114,10 +104,9 @@ def test_stdin_from_tty_fails(casq_env):
         assert len(error_output) > 0
 
 
-def test_missing_required_argument(casq_env):
+def test_missing_required_argument(initialized_casq_env):
     """Test that missing required arguments show helpful error."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     # Try get without hash argument
     proc = run_casq(casq_bin, env, "get")
@@ -128,10 +117,9 @@ def test_missing_required_argument(casq_env):
     assert "usage" in (proc.stderr).lower()
 
 
-def test_materialize_missing_destination(casq_env):
+def test_materialize_missing_destination(initialized_casq_env):
     """Test materialize without destination argument."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     fake_hash = "0" * 64
     proc = run_casq(casq_bin, env, "materialize", fake_hash)
@@ -141,20 +129,18 @@ def test_materialize_missing_destination(casq_env):
     assert "destination" in error_output.lower() or "Usage:" in error_output
 
 
-def test_references_add_invalid_hash(casq_env):
+def test_references_add_invalid_hash(initialized_casq_env):
     """Test adding reference with invalid hash format."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     proc = run_casq(casq_bin, env, "references", "add", "bad-ref", "nothash")
     assert proc.returncode != 0
     assert "invalid" in (proc.stderr + proc.stdout).lower()
 
 
-def test_references_add_nonexistent_hash(casq_env):
+def test_references_add_nonexistent_hash(initialized_casq_env):
     """Test adding reference to non-existent object."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     fake_hash = "0" * 64
     proc = run_casq(casq_bin, env, "references", "add", "ref", fake_hash)
@@ -163,18 +149,15 @@ def test_references_add_nonexistent_hash(casq_env):
     assert proc.returncode in (0, 1)
 
 
-def test_json_error_format(casq_env):
+def test_json_error_format(initialized_casq_env):
     """Test that errors in JSON mode have proper format."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     # Trigger an error with --json flag
     proc = run_casq(casq_bin, env, "--json", "get", "invalidhash")
     assert proc.returncode != 0
 
     # Error should be in stderr as JSON
-    import json
-
     try:
         error_data = json.loads(proc.stderr)
         assert error_data.get("success") is False
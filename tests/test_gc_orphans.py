@@ -2,32 +2,26 @@
 Tests for garbage collection and orphan detection.
 """
 
-import json
-from .helpers import run_casq, assert_json_success, write_test_file
+import pytest
 
+from .helpers import assert_json_success, object_path, run_casq, stdout_hash
 
-def test_collect_garbage_empty_store(casq_env):
+
+def test_collect_garbage_empty_store(initialized_casq_env):
     """Test GC on empty store."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     proc_gc = run_casq(casq_bin, env, "collect-garbage")
     assert proc_gc.returncode == 0
     assert "0" in proc_gc.stdout  # Should delete 0 objects
 
 
-def test_collect_garbage_dry_run(casq_env):
+def test_collect_garbage_dry_run(initialized_casq_env):
     """Test GC dry-run mode."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     # Add object without reference (will be orphaned)
-    workspace = root.parent / "workspace"
-    workspace.mkdir()
-    test_file = workspace / "file.txt"
-    write_test_file(test_file, "orphan content\n")
-
-    run_casq(casq_bin, env, "put", str(test_file))
+    run_casq(casq_bin, env, "put", "-", input="orphan content\n")
 
     # Dry run GC
     proc_gc = run_casq(casq_bin, env, "collect-garbage", "--dry-run")
@@ -35,24 +29,18 @@ def test_collect_garbage_dry_run(casq_env):
     assert "Dry run" in proc_gc.stdout or "Would delete" in proc_gc.stdout
 
 
-def test_collect_garbage_removes_orphans(casq_env):
+@pytest.mark.smoke
+def test_collect_garbage_removes_orphans(initialized_casq_env):
     """Test that GC removes unreferenced objects."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     # Add object without reference
     proc_put = run_casq(casq_bin, env, "put", "-", input="orphan\n")
-    orphan_hash = proc_put.stdout.strip()
+    orphan_hash = stdout_hash(proc_put)
 
     # Verify object exists
-    objects_dir = root / "objects" / "blake3-256"
-    assert objects_dir.exists()
-
-    # Count objects before GC
-    import os
-
-    obj_count_before = sum(1 for _ in objects_dir.rglob("*") if _.is_file())
-    assert obj_count_before > 0
+    orphan_path = object_path(root, orphan_hash)
+    assert orphan_path.exists()
 
     # Run GC
     proc_gc = run_casq(casq_bin, env, "collect-garbage")
@@ -61,33 +49,32 @@ def test_collect_garbage_removes_orphans(casq_env):
     # Should have deleted the orphan
     output = proc_gc.stdout
     assert "Deleted" in output or "deleted" in output
+    assert not orphan_path.exists()
 
 
-def test_collect_garbage_keeps_referenced(casq_env):
+def test_collect_garbage_keeps_referenced(initialized_casq_env):
     """Test that GC keeps objects with references."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     # Add object with reference
     proc_put = run_casq(
         casq_bin, env, "put", "-", "--reference", "keep-me", input="important data\n"
     )
-    kept_hash = proc_put.stdout.strip()
+    kept_hash = stdout_hash(proc_put)
 
     # Run GC
     proc_gc = run_casq(casq_bin, env, "collect-garbage")
     assert proc_gc.returncode == 0
 
     # Object should still exist
-    proc_get = run_casq(casq_bin, env, "get", kept_hash)
+    proc_get = run_casq(casq_bin, env, "get", kept_hash, text=False)
     assert proc_get.returncode == 0
-    assert proc_get.stdout == "important data\n"
+    assert proc_get.stdout == b"important data\n"
 
 
-def test_collect_garbage_json_output(casq_env):
+def test_collect_garbage_json_output(initialized_casq_env):
     """Test GC with JSON output."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     # Add orphan
     run_casq(casq_bin, env, "put", "-", input="orphan\n")
@@ -101,10 +88,9 @@ def test_collect_garbage_json_output(casq_env):
     assert data["bytes_freed"] > 0
 
 
-def test_find_orphans_empty_store(casq_env):
+def test_find_orphans_empty_store(initialized_casq_env):
     """Test finding orphans in empty store."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     proc_orphans = run_casq(casq_bin, env, "find-orphans")
     assert proc_orphans.returncode == 0
@@ -112,28 +98,27 @@ def test_find_orphans_empty_store(casq_env):
     assert proc_orphans.stdout == ""
 
 
-def test_find_orphans_detects_unreferenced(casq_env):
+@pytest.mark.smoke
+def test_find_orphans_detects_unreferenced(initialized_casq_env):
     """Test that find-orphans detects unreferenced objects."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     # Add object without reference
     proc_put = run_casq(casq_bin, env, "put", "-", input="orphan data\n")
-    orphan_hash = proc_put.stdout.strip()
+    orphan_hash = stdout_hash(proc_put)
 
     proc_orphans = run_casq(casq_bin, env, "find-orphans")
     assert proc_orphans.returncode == 0
     assert orphan_hash in proc_orphans.stdout
 
 
-def test_find_orphans_long_format(casq_env):
+def test_find_orphans_long_format(initialized_casq_env):
     """Test find-orphans with --long flag."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     # Add orphan
     proc_put = run_casq(casq_bin, env, "put", "-", input="orphan\n")
-    orphan_hash = proc_put.stdout.strip()
+    orphan_hash = stdout_hash(proc_put)
 
     proc_orphans = run_casq(casq_bin, env, "find-orphans", "--long")
     assert proc_orphans.returncode == 0
@@ -145,10 +130,9 @@ def test_find_orphans_long_format(casq_env):
     assert "Approx size:" in output
 
 
-def test_find_orphans_ignores_referenced(casq_env):
+def test_find_orphans_ignores_referenced(initialized_casq_env):
     """Test that find-orphans ignores referenced objects."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     # Add object with reference
     proc_put = run_casq(
@@ -160,7 +144,7 @@ def test_find_orphans_ignores_referenced(casq_env):
         "not-orphan",
         input="referenced data\n",
     )
-    ref_hash = proc_put.stdout.strip()
+    ref_hash = stdout_hash(proc_put)
 
     proc_orphans = run_casq(casq_bin, env, "find-orphans")
     assert proc_orphans.returncode == 0
@@ -169,14 +153,13 @@ def test_find_orphans_ignores_referenced(casq_env):
     assert ref_hash not in proc_orphans.stdout
 
 
-def test_find_orphans_json_output(casq_env):
+def test_find_orphans_json_output(initialized_casq_env):
     """Test find-orphans with JSON output."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     # Add orphan
     proc_put = run_casq(casq_bin, env, "put", "-", input="orphan json test\n")
-    orphan_hash = proc_put.stdout.strip()
+    orphan_hash = stdout_hash(proc_put)
 
     proc_orphans = run_casq(casq_bin, env, "--json", "find-orphans")
     assert proc_orphans.returncode == 0
@@ -189,10 +172,9 @@ def test_find_orphans_json_output(casq_env):
     assert orphan_found
 
 
-def test_gc_then_find_orphans_empty(casq_env):
+def test_gc_then_find_orphans_empty(initialized_casq_env):
     """Test that find-orphans shows nothing after GC."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     # Add orphan
     run_casq(casq_bin, env, "put", "-", input="will be collected\n")
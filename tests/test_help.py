@@ -2,9 +2,12 @@
 Tests for casq help text and UX output.
 """
 
+import pytest
+
 from .helpers import run_casq
 
 
+@pytest.mark.smoke
 def test_top_level_help(casq_env):
     """Test that casq --help shows usage and commands."""
     casq_bin, env, _ = casq_env
@@ -13,8 +16,9 @@ def test_top_level_help(casq_env):
     assert proc.returncode == 0
     assert "Content-addressed file store using BLAKE3" in proc.stdout
     assert "Commands:" in proc.stdout
-    assert "initialize" in proc.stdout.lower()
-    assert "put" in proc.stdout.lower()
+    help_text = proc.stdout.lower()
+    assert "initialize" in help_text
+    assert "put" in help_text
     assert proc.stderr == ""
 
 
@@ -29,33 +33,22 @@ def test_version_flag(casq_env):
     assert len(proc.stdout.strip()) > 0
 
 
-def test_initialize_help(casq_env):
-    """Test that casq initialize --help shows subcommand help."""
-    casq_bin, env, _ = casq_env
-    proc = run_casq(casq_bin, env, "initialize", "--help")
-
-    assert proc.returncode == 0
-    assert "Initialize a new store" in proc.stdout
-    assert "algorithm" in proc.stdout.lower()
-
-
-def test_put_help(casq_env):
-    """Test that casq put --help shows subcommand help."""
-    casq_bin, env, _ = casq_env
-    proc = run_casq(casq_bin, env, "put", "--help")
-
-    assert proc.returncode == 0
-    assert "Put files or directories" in proc.stdout
-    assert "reference" in proc.stdout.lower()
-
-
-def test_references_help(casq_env):
-    """Test that casq references --help shows reference subcommands."""
+@pytest.mark.parametrize(
+    "subcommand,summary,keywords",
+    [
+        ("initialize", "Initialize a new store", ["algorithm"]),
+        ("put", "Put files or directories", ["reference"]),
+        ("references", "Manage references", ["add", "list", "remove"]),
+    ],
+    ids=["initialize", "put", "references"],
+)
+def test_subcommand_help(casq_env, subcommand, summary, keywords):
+    """Test that casq <subcommand> --help shows subcommand help."""
     casq_bin, env, _ = casq_env
-    proc = run_casq(casq_bin, env, "references", "--help")
+    proc = run_casq(casq_bin, env, subcommand, "--help")
 
     assert proc.returncode == 0
-    assert "Manage references" in proc.stdout
-    assert "add" in proc.stdout.lower()
-    assert "list" in proc.stdout.lower()
-    assert "remove" in proc.stdout.lower()
+    assert summary in proc.stdout
+    help_text = proc.stdout.lower()
+    for keyword in keywords:
+        assert keyword in help_text
@@ -2,61 +2,50 @@
 Tests for casq metadata command.
 """
 
-import json
-from .helpers import run_casq, assert_json_success, write_test_file, write_test_tree
+import pytest
 
+from .helpers import (
+    assert_json_success,
+    parse_metadata,
+    run_casq,
+)
 
-def test_metadata_for_blob(casq_env):
-    """Test getting metadata for a blob object."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
 
-    content = "metadata test blob\n"
-    proc_put = run_casq(casq_bin, env, "put", "-", input=content)
-    blob_hash = proc_put.stdout.strip()
+@pytest.mark.smoke
+def test_metadata_for_blob(initialized_casq_env, sample_blob):
+    """Test getting metadata for a blob object."""
+    casq_bin, env, root = initialized_casq_env
+    blob_hash, content = sample_blob
 
     # Get metadata
     proc_meta = run_casq(casq_bin, env, "metadata", blob_hash)
     assert proc_meta.returncode == 0
 
-    output = proc_meta.stdout
-    assert "Hash:" in output
-    assert "Type: blob" in output
-    assert "Size:" in output
-    assert blob_hash in output
+    fields = parse_metadata(proc_meta.stdout)
+    assert fields["Hash"] == blob_hash
+    assert fields["Type"] == "blob"
+    assert fields["Size"] == f"{len(content)} bytes"
 
 
-def test_metadata_for_tree(casq_env):
+def test_metadata_for_tree(tree_casq_env):
     """Test getting metadata for a tree object."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
-
-    workspace = root.parent / "workspace"
-    workspace.mkdir()
-    write_test_tree(workspace)
-
-    proc_put = run_casq(casq_bin, env, "put", str(workspace))
-    tree_hash = proc_put.stdout.strip()
+    casq_bin, env, root, tree_hash = tree_casq_env
 
     # Get metadata
     proc_meta = run_casq(casq_bin, env, "metadata", tree_hash)
     assert proc_meta.returncode == 0
 
-    output = proc_meta.stdout
-    assert "Hash:" in output
-    assert "Type: tree" in output
-    assert "Entries:" in output
-    assert tree_hash in output
+    fields = parse_metadata(proc_meta.stdout)
+    assert fields["Hash"] == tree_hash
+    assert fields["Type"] == "tree"
+    # file1.txt, file2.txt and subdir
+    assert fields["Entries"] == "3"
 
 
-def test_metadata_json_output(casq_env):
+def test_metadata_json_output(initialized_casq_env, sample_blob):
     """Test metadata command with JSON output."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
-
-    content = "json metadata test\n"
-    proc_put = run_casq(casq_bin, env, "put", "-", input=content)
-    blob_hash = proc_put.stdout.strip()
+    casq_bin, env, root = initialized_casq_env
+    blob_hash, content = sample_blob
 
     proc_meta = run_casq(casq_bin, env, "--json", "metadata", blob_hash)
     assert proc_meta.returncode == 0
@@ -69,17 +58,9 @@ def test_metadata_json_output(casq_env):
     assert "size_on_disk" in data
 
 
-def test_metadata_tree_json(casq_env):
+def test_metadata_tree_json(tree_casq_env):
     """Test metadata for tree with JSON output."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
-
-    workspace = root.parent / "workspace"
-    workspace.mkdir()
-    write_test_tree(workspace)
-
-    proc_put = run_casq(casq_bin, env, "put", str(workspace))
-    tree_hash = proc_put.stdout.strip()
+    casq_bin, env, root, tree_hash = tree_casq_env
 
     proc_meta = run_casq(casq_bin, env, "--json", "metadata", tree_hash)
     assert proc_meta.returncode == 0
@@ -91,25 +72,21 @@ def test_metadata_tree_json(casq_env):
     assert data["entry_count"] >= 3
 
 
-def test_metadata_nonexistent_hash(casq_env):
+def test_metadata_nonexistent_hash(initialized_casq_env):
     """Test metadata with non-existent hash returns error."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     fake_hash = "0" * 64
     proc_meta = run_casq(casq_bin, env, "metadata", fake_hash)
 
     assert proc_meta.returncode != 0
-    assert (
-        "not found" in proc_meta.stderr.lower()
-        or "not found" in proc_meta.stdout.lower()
-    )
+    error_output = (proc_meta.stderr + proc_meta.stdout).lower()
+    assert "not found" in error_output
 
 
-def test_metadata_invalid_hash(casq_env):
+def test_metadata_invalid_hash(initialized_casq_env):
     """Test metadata with invalid hash format returns error."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     invalid_hash = "notahash"
     proc_meta = run_casq(casq_bin, env, "metadata", invalid_hash)
@@ -2,15 +2,23 @@
 Tests for core casq workflow: put, list, get, materialize.
 """
 
-import json
-from pathlib import Path
-from .helpers import run_casq, assert_json_success, write_test_file, write_test_tree
+import pytest
 
+from .helpers import (
+    assert_json_success,
+    content_hash,
+    read_refs,
+    run_casq,
+    stdout_hash,
+    write_test_file,
+    write_test_tree,
+)
 
-def test_put_single_file(casq_env):
+
+@pytest.mark.smoke
+def test_put_single_file(initialized_casq_env):
     """Test putting a single file to the store."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     # Create test file
     workspace = root.parent / "workspace"
@@ -23,14 +31,12 @@ def test_put_single_file(casq_env):
     assert proc.returncode == 0
 
     # Should output hash to stdout
-    hash_str = proc.stdout.strip()
-    assert len(hash_str) == 64  # BLAKE3 hash is 64 hex chars
+    assert stdout_hash(proc) == content_hash("hello world\n")
 
 
-def test_put_with_json(casq_env):
+def test_put_with_json(initialized_casq_env):
     """Test putting a file with JSON output."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     workspace = root.parent / "workspace"
     workspace.mkdir()
@@ -41,14 +47,13 @@ def test_put_with_json(casq_env):
     assert proc.returncode == 0
 
     data = assert_json_success(proc.stdout, ["object"])
-    assert "hash" in data["object"]
+    assert data["object"]["hash"] == content_hash("test content\n")
     assert data["object"]["path"] == str(test_file)
 
 
-def test_put_directory_tree(casq_env):
+def test_put_directory_tree(initialized_casq_env):
     """Test putting a directory tree."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     workspace = root.parent / "workspace"
     workspace.mkdir()
@@ -57,14 +62,13 @@ def test_put_directory_tree(casq_env):
     proc = run_casq(casq_bin, env, "put", str(workspace))
     assert proc.returncode == 0
 
-    hash_str = proc.stdout.strip()
-    assert len(hash_str) == 64
+    # stdout_hash asserts stdout is exactly one 64-char hash line
+    stdout_hash(proc)
 
 
-def test_put_with_reference(casq_env):
+def test_put_with_reference(initialized_casq_env):
     """Test putting a file and creating a reference."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     workspace = root.parent / "workspace"
     workspace.mkdir()
@@ -77,47 +81,37 @@ def test_put_with_reference(casq_env):
     # Reference name should be in stderr
     assert "test-ref" in proc.stderr
 
-    # Verify reference was created
-    assert (root / "refs" / "test-ref").exists()
+    # Verify reference was created and points at the stored object
+    assert read_refs(root)["test-ref"] == stdout_hash(proc)
 
 
-def test_put_from_stdin(casq_env):
+def test_put_from_stdin(initialized_casq_env):
     """Test putting content from stdin using '-'."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     content = "stdin test content\n"
     proc = run_casq(casq_bin, env, "put", "-", input=content)
     assert proc.returncode == 0
 
-    hash_str = proc.stdout.strip()
-    assert len(hash_str) == 64
+    assert stdout_hash(proc) == content_hash(content)
 
 
-def test_get_blob_to_stdout(casq_env):
+@pytest.mark.smoke
+def test_get_blob_to_stdout(initialized_casq_env, sample_blob):
     """Test getting a blob's content to stdout."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
-
-    # Put content
-    content = "blob content for get test\n"
-    proc_put = run_casq(casq_bin, env, "put", "-", input=content)
-    hash_str = proc_put.stdout.strip()
+    casq_bin, env, root = initialized_casq_env
+    hash_str, content = sample_blob
 
     # Get content back
-    proc_get = run_casq(casq_bin, env, "get", hash_str)
+    proc_get = run_casq(casq_bin, env, "get", hash_str, text=False)
     assert proc_get.returncode == 0
-    assert proc_get.stdout == content
+    assert proc_get.stdout == content.encode()
 
 
-def test_get_with_json_fails(casq_env):
+def test_get_with_json_fails(initialized_casq_env, sample_blob):
     """Test that get with --json flag fails with helpful message."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
-
-    # Put content
-    proc_put = run_casq(casq_bin, env, "put", "-", input="test\n")
-    hash_str = proc_put.stdout.strip()
+    casq_bin, env, root = initialized_casq_env
+    hash_str, _ = sample_blob
 
     # Try get with --json (should fail)
     proc_get = run_casq(casq_bin, env, "--json", "get", hash_str)
@@ -125,118 +119,86 @@ def test_get_with_json_fails(casq_env):
     assert "cannot be used with --json" in proc_get.stderr
 
 
-def test_list_tree_contents(casq_env):
+@pytest.mark.smoke
+def test_list_tree_contents(tree_casq_env):
     """Test listing tree contents."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
-
-    # Create and put directory tree
-    workspace = root.parent / "workspace"
-    workspace.mkdir()
-    write_test_tree(workspace)
-
-    proc_put = run_casq(casq_bin, env, "put", str(workspace))
-    tree_hash = proc_put.stdout.strip()
+    casq_bin, env, root, tree_hash = tree_casq_env
 
     # List tree contents
     proc_list = run_casq(casq_bin, env, "list", tree_hash)
     assert proc_list.returncode == 0
-    assert "file1.txt" in proc_list.stdout
-    assert "file2.txt" in proc_list.stdout
-    assert "subdir" in proc_list.stdout
+    # One entry name per line
+    assert set(proc_list.stdout.splitlines()) == {"file1.txt", "file2.txt", "subdir"}
 
 
-def test_list_tree_long_format(casq_env):
+def test_list_tree_long_format(tree_casq_env):
     """Test listing tree contents with --long flag."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
-
-    workspace = root.parent / "workspace"
-    workspace.mkdir()
-    write_test_tree(workspace)
-
-    proc_put = run_casq(casq_bin, env, "put", str(workspace))
-    tree_hash = proc_put.stdout.strip()
+    casq_bin, env, root, tree_hash = tree_casq_env
 
     # List with --long
     proc_list = run_casq(casq_bin, env, "list", tree_hash, "--long")
     assert proc_list.returncode == 0
 
-    # Should include mode, type, and hash
-    assert "file1.txt" in proc_list.stdout
-    # Should show type indicator (b for blob, t for tree)
-    assert "b " in proc_list.stdout or "t " in proc_list.stdout
+    # Each line is "<type> <mode> <hash> <name>"; type is b for blob, t for tree
+    types = {}
+    for line in proc_list.stdout.splitlines():
+        entry_type, _mode, _hash, name = line.split(" ", 3)
+        types[name] = entry_type
+    assert types == {"file1.txt": "b", "file2.txt": "b", "subdir": "t"}
 
 
-def test_list_blob_shows_info(casq_env):
+def test_list_blob_shows_info(initialized_casq_env, sample_blob):
     """Test that listing a blob shows blob info."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
-
-    proc_put = run_casq(casq_bin, env, "put", "-", input="test blob\n")
-    blob_hash = proc_put.stdout.strip()
+    casq_bin, env, root = initialized_casq_env
+    blob_hash, _ = sample_blob
 
     proc_list = run_casq(casq_bin, env, "list", blob_hash)
     assert proc_list.returncode == 0
     assert "blob" in proc_list.stdout
 
 
-def test_materialize_blob(casq_env):
+@pytest.mark.smoke
+def test_materialize_blob(initialized_casq_env, sample_blob):
     """Test materializing a blob to filesystem."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
-
-    content = "materialize test content\n"
-    proc_put = run_casq(casq_bin, env, "put", "-", input=content)
-    hash_str = proc_put.stdout.strip()
+    casq_bin, env, root = initialized_casq_env
+    hash_str, content = sample_blob
 
     # Materialize to destination
     dest = root.parent / "output.txt"
     proc_mat = run_casq(casq_bin, env, "materialize", hash_str, str(dest))
     assert proc_mat.returncode == 0
 
-    # Verify content
-    assert dest.exists()
+    # Verify content (read_text fails if the file is missing)
     assert dest.read_text() == content
 
 
-def test_materialize_tree(casq_env):
+def test_materialize_tree(tree_casq_env):
     """Test materializing a tree to filesystem."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
-
-    # Create and put tree
-    workspace = root.parent / "workspace"
-    workspace.mkdir()
-    write_test_tree(workspace)
-
-    proc_put = run_casq(casq_bin, env, "put", str(workspace))
-    tree_hash = proc_put.stdout.strip()
+    casq_bin, env, root, tree_hash = tree_casq_env
 
     # Materialize to new location
     dest = root.parent / "restored"
     proc_mat = run_casq(casq_bin, env, "materialize", tree_hash, str(dest))
     assert proc_mat.returncode == 0
 
-    # Verify structure
-    assert (dest / "file1.txt").exists()
-    assert (dest / "file2.txt").exists()
-    assert (dest / "subdir" / "nested.txt").exists()
+    # Verify structure and content in one read per file
     assert (dest / "file1.txt").read_text() == "file 1 content\n"
+    assert (dest / "file2.txt").read_text() == "file 2 content\n"
+    assert (dest / "subdir" / "nested.txt").read_text() == "nested content\n"
 
 
-def test_roundtrip_integrity(casq_env):
+def test_roundtrip_integrity(initialized_casq_env):
     """Test that put + get maintains data integrity."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
-    original_content = "Round-trip integrity test\nWith multiple lines\nAnd special chars: \x00\x01\xff\n"
+    original_content = b"Round-trip integrity test\nWith multiple lines\nAnd special chars: \x00\x01\xff\n"
 
-    # Put content
-    proc_put = run_casq(casq_bin, env, "put", "-", input=original_content)
-    hash_str = proc_put.stdout.strip()
+    # Put content as raw bytes (not valid UTF-8)
+    proc_put = run_casq(casq_bin, env, "put", "-", input=original_content, text=False)
+    hash_str = stdout_hash(proc_put)
+    assert hash_str == content_hash(original_content)
 
-    # Get content back
-    proc_get = run_casq(casq_bin, env, "get", hash_str)
+    # Get content back byte-for-byte
+    proc_get = run_casq(casq_bin, env, "get", hash_str, text=False)
     assert proc_get.returncode == 0
     assert proc_get.stdout == original_content
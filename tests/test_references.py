@@ -2,14 +2,22 @@
 Tests for reference management (references add/list/remove).
 """
 
-import json
-from .helpers import run_casq, assert_json_success
+import pytest
 
+from .helpers import (
+    assert_json_success,
+    object_path,
+    parse_references_list,
+    read_ref,
+    read_refs,
+    run_casq,
+    stdout_hash,
+)
 
-def test_references_list_empty(casq_env):
+
+def test_references_list_empty(initialized_casq_env):
     """Test listing references in empty store."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     proc_list = run_casq(casq_bin, env, "references", "list")
     assert proc_list.returncode == 0
@@ -17,50 +25,47 @@ def test_references_list_empty(casq_env):
     assert proc_list.stdout == ""
 
 
-def test_references_add(casq_env):
+@pytest.mark.smoke
+def test_references_add(initialized_casq_env, sample_blob):
     """Test adding a reference."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
-
-    # Put an object
-    proc_put = run_casq(casq_bin, env, "put", "-", input="ref test\n")
-    obj_hash = proc_put.stdout.strip()
+    casq_bin, env, root = initialized_casq_env
+    obj_hash, _ = sample_blob
 
     # Add reference
     proc_add = run_casq(casq_bin, env, "references", "add", "my-ref", obj_hash)
     assert proc_add.returncode == 0
     assert "my-ref" in proc_add.stderr or obj_hash in proc_add.stderr
 
-    # Verify reference file exists
-    assert (root / "refs" / "my-ref").exists()
+    # Verify reference is recorded on disk
+    assert read_refs(root)["my-ref"] == obj_hash
 
 
-def test_references_list_shows_added(casq_env):
+@pytest.mark.smoke
+def test_references_list_shows_added(initialized_casq_env):
     """Test that list shows added references."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
-    # Add reference
-    proc_put = run_casq(casq_bin, env, "put", "-", input="test\n")
-    obj_hash = proc_put.stdout.strip()
-    run_casq(casq_bin, env, "references", "add", "test-ref", obj_hash)
+    # Put and reference in one invocation
+    proc_put = run_casq(
+        casq_bin, env, "put", "-", "--reference", "test-ref", input="test\n"
+    )
+    obj_hash = stdout_hash(proc_put)
 
     # List references
     proc_list = run_casq(casq_bin, env, "references", "list")
     assert proc_list.returncode == 0
-    assert "test-ref" in proc_list.stdout
-    assert obj_hash in proc_list.stdout
+    assert parse_references_list(proc_list.stdout) == {"test-ref": obj_hash}
 
 
-def test_references_list_json(casq_env):
+def test_references_list_json(initialized_casq_env):
     """Test listing references with JSON output."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
-    # Add reference
-    proc_put = run_casq(casq_bin, env, "put", "-", input="json ref test\n")
-    obj_hash = proc_put.stdout.strip()
-    run_casq(casq_bin, env, "references", "add", "json-ref", obj_hash)
+    # Put and reference in one invocation
+    proc_put = run_casq(
+        casq_bin, env, "put", "-", "--reference", "json-ref", input="json ref test\n"
+    )
+    obj_hash = stdout_hash(proc_put)
 
     # List with JSON
     proc_list = run_casq(casq_bin, env, "--json", "references", "list")
@@ -76,13 +81,10 @@ def test_references_list_json(casq_env):
     assert ref_found
 
 
-def test_references_add_json(casq_env):
+def test_references_add_json(initialized_casq_env, sample_blob):
     """Test adding reference with JSON output."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
-
-    proc_put = run_casq(casq_bin, env, "put", "-", input="test\n")
-    obj_hash = proc_put.stdout.strip()
+    casq_bin, env, root = initialized_casq_env
+    obj_hash, _ = sample_blob
 
     proc_add = run_casq(
         casq_bin, env, "--json", "references", "add", "new-ref", obj_hash
@@ -94,18 +96,18 @@ def test_references_add_json(casq_env):
     assert data["hash"] == obj_hash
 
 
-def test_references_remove(casq_env):
+@pytest.mark.smoke
+def test_references_remove(initialized_casq_env):
     """Test removing a reference."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
-    # Add reference
-    proc_put = run_casq(casq_bin, env, "put", "-", input="will remove\n")
-    obj_hash = proc_put.stdout.strip()
-    run_casq(casq_bin, env, "references", "add", "temp-ref", obj_hash)
+    # Put and reference in one invocation
+    proc_put = run_casq(
+        casq_bin, env, "put", "-", "--reference", "temp-ref", input="will remove\n"
+    )
 
     # Verify it exists
-    assert (root / "refs" / "temp-ref").exists()
+    assert read_ref(root, "temp-ref") == stdout_hash(proc_put)
 
     # Remove reference
     proc_rm = run_casq(casq_bin, env, "references", "remove", "temp-ref")
@@ -113,18 +115,15 @@ def test_references_remove(casq_env):
     assert "Removed" in proc_rm.stderr or "temp-ref" in proc_rm.stderr
 
     # Verify it's gone
-    assert not (root / "refs" / "temp-ref").exists()
+    assert read_ref(root, "temp-ref") is None
 
 
-def test_references_remove_json(casq_env):
+def test_references_remove_json(initialized_casq_env):
     """Test removing reference with JSON output."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     # Add and remove reference
-    proc_put = run_casq(casq_bin, env, "put", "-", input="test\n")
-    obj_hash = proc_put.stdout.strip()
-    run_casq(casq_bin, env, "references", "add", "temp", obj_hash)
+    run_casq(casq_bin, env, "put", "-", "--reference", "temp", input="test\n")
 
     proc_rm = run_casq(casq_bin, env, "--json", "references", "remove", "temp")
     assert proc_rm.returncode == 0
@@ -133,59 +132,79 @@ def test_references_remove_json(casq_env):
     assert data["name"] == "temp"
 
 
-def test_references_remove_nonexistent(casq_env):
+def test_references_remove_nonexistent(initialized_casq_env):
     """Test removing non-existent reference returns error."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     proc_rm = run_casq(casq_bin, env, "references", "remove", "does-not-exist")
     assert proc_rm.returncode != 0
 
 
-def test_references_add_multiple(casq_env):
+def test_references_add_multiple(initialized_casq_env, sample_blob):
     """Test adding multiple references."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
-
-    # Add object
-    proc_put = run_casq(casq_bin, env, "put", "-", input="multi-ref test\n")
-    obj_hash = proc_put.stdout.strip()
+    casq_bin, env, root = initialized_casq_env
+    obj_hash, _ = sample_blob
 
     # Add multiple references to same object
     run_casq(casq_bin, env, "references", "add", "ref1", obj_hash)
     run_casq(casq_bin, env, "references", "add", "ref2", obj_hash)
     run_casq(casq_bin, env, "references", "add", "ref3", obj_hash)
 
-    # List should show all three
-    proc_list = run_casq(casq_bin, env, "references", "list")
-    assert proc_list.returncode == 0
-    assert "ref1" in proc_list.stdout
-    assert "ref2" in proc_list.stdout
-    assert "ref3" in proc_list.stdout
-
-
-def test_references_prevent_gc(casq_env):
+    # All three should point at the object
+    refs = read_refs(root)
+    assert refs["ref1"] == obj_hash
+    assert refs["ref2"] == obj_hash
+    assert refs["ref3"] == obj_hash
+
+
+@pytest.mark.parametrize(
+    "name,valid",
+    [
+        ("backup-2024", True),
+        ("v1.0_final", True),
+        ("../escape", False),
+        ("nested/name", False),
+        ("back\\slash", False),
+        ("", False),
+    ],
+)
+def test_references_add_name_validation(initialized_casq_env, sample_blob, name, valid):
+    """Test that reference names are validated before anything is written."""
+    casq_bin, env, root = initialized_casq_env
+    obj_hash, _ = sample_blob
+
+    proc_add = run_casq(casq_bin, env, "references", "add", name, obj_hash)
+
+    if valid:
+        assert proc_add.returncode == 0
+        assert read_refs(root) == {name: obj_hash}
+    else:
+        assert proc_add.returncode != 0
+        assert "failed to add reference" in proc_add.stderr.lower()
+        assert read_refs(root) == {}
+
+
+def test_references_prevent_gc(initialized_casq_env):
     """Test that references prevent garbage collection."""
-    casq_bin, env, root = casq_env
-    run_casq(casq_bin, env, "initialize")
+    casq_bin, env, root = initialized_casq_env
 
     # Add object with reference
-    proc_put = run_casq(casq_bin, env, "put", "-", input="protected\n")
-    obj_hash = proc_put.stdout.strip()
-    run_casq(casq_bin, env, "references", "add", "protect", obj_hash)
+    proc_put = run_casq(
+        casq_bin, env, "put", "-", "--reference", "protect", input="protected\n"
+    )
+    obj_hash = stdout_hash(proc_put)
+
+    obj_path = object_path(root, obj_hash)
 
     # Run GC
     run_casq(casq_bin, env, "collect-garbage")
 
-    # Object should still be accessible
-    proc_get = run_casq(casq_bin, env, "get", obj_hash)
-    assert proc_get.returncode == 0
-    assert proc_get.stdout == "protected\n"
+    # Object should survive
+    assert obj_path.exists()
 
     # Remove reference and GC again
     run_casq(casq_bin, env, "references", "remove", "protect")
     run_casq(casq_bin, env, "collect-garbage")
 
     # Now object should be gone
-    proc_get2 = run_casq(casq_bin, env, "get", obj_hash)
-    assert proc_get2.returncode != 0
+    assert not obj_path.exists()